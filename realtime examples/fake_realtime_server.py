@@ -0,0 +1,277 @@
+#!/usr/bin/env uv run
+####################################################################
+# Local stand-in for the Realtime API WebSocket endpoint           #
+# Speaks just enough of the protocol to drive `voice_relay.py`     #
+# without an API key or network access:                            #
+#                                                                  #
+# `./fake_realtime_server.py --port 8765`                          #
+#                                                                  #
+# then point the relay at it with                                  #
+# `./voice_relay.py serve --upstream-url ws://127.0.0.1:8765/v1`   #
+####################################################################
+#
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "websockets",
+# ]
+# ///
+from __future__ import annotations
+
+import json
+import base64
+import asyncio
+import logging
+import argparse
+import itertools
+from typing import Any
+
+import websockets
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+logger = logging.getLogger(__name__)
+
+_ids = itertools.count(1)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_fake_{next(_ids)}"
+
+
+class FakeRealtimeServer:
+    """A minimal Realtime API server for local runs and load tests.
+
+    Audio appended by the client is echoed back as the response audio, split
+    into `audio_chunk_ms` deltas and interleaved with transcript deltas for
+    `response_text`. With server VAD on, a turn ends once no audio has arrived
+    for `vad_silence_ms`; otherwise the client has to commit the buffer and
+    call `response.create` itself.
+    """
+
+    def __init__(
+        self,
+        *,
+        response_text: str = "Hello from the fake realtime server.",
+        response_delay: float = 0.0,
+        audio_chunk_ms: int = 40,
+        vad_silence_ms: int = 200,
+        sample_rate: int = 24000,
+    ) -> None:
+        self.response_text = response_text
+        self.response_delay = response_delay
+        self.sample_rate = sample_rate
+        self.audio_chunk_bytes = sample_rate * 2 * audio_chunk_ms // 1000
+        self.vad_silence = vad_silence_ms / 1000
+        self.connections = 0
+        self._server: Server | None = None
+
+    @property
+    def url(self) -> str:
+        """The value to pass as `websocket_base_url` to `AsyncOpenAI`."""
+        assert self._server is not None, "server is not running"
+        host, port = list(self._server.sockets)[0].getsockname()[:2]
+        return f"ws://{host}:{port}/v1"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> FakeRealtimeServer:
+        self._server = await serve(self._handle, host, port, compression=None, max_size=None)
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> FakeRealtimeServer:
+        return await self.start()
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    async def _handle(self, websocket: ServerConnection) -> None:
+        self.connections += 1
+        try:
+            await _FakeSession(self, websocket).run()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+
+
+class _FakeSession:
+    def __init__(self, server: FakeRealtimeServer, websocket: ServerConnection) -> None:
+        self.server = server
+        self.websocket = websocket
+        self.session: dict[str, Any] = {
+            "id": _new_id("sess"),
+            "object": "realtime.session",
+            "model": "gpt-4o-realtime-preview",
+            "modalities": ["audio", "text"],
+            "voice": "alloy",
+            "input_audio_format": "pcm16",
+            "output_audio_format": "pcm16",
+            "turn_detection": {"type": "server_vad"},
+        }
+        self.audio = bytearray()
+        self.committed_audio = b""
+        self.appended_bytes = 0
+        self.speaking = False
+        self.vad_timer: asyncio.TimerHandle | None = None
+        self.vad_task: asyncio.Task[None] | None = None
+        self.response_task: asyncio.Task[None] | None = None
+        self.response_id = ""
+
+    async def send(self, event: dict[str, Any]) -> None:
+        event.setdefault("event_id", _new_id("event"))
+        await self.websocket.send(json.dumps(event))
+
+    async def run(self) -> None:
+        await self.send({"type": "session.created", "session": self.session})
+        try:
+            async for message in self.websocket:
+                await self.on_event(json.loads(message))
+        finally:
+            if self.vad_timer is not None:
+                self.vad_timer.cancel()
+            if self.vad_task is not None:
+                self.vad_task.cancel()
+            if self.response_task is not None:
+                self.response_task.cancel()
+
+    async def on_event(self, event: dict[str, Any]) -> None:
+        kind = event.get("type")
+
+        if kind == "session.update":
+            self.session.update(event.get("session", {}))
+            await self.send({"type": "session.updated", "session": self.session})
+            return
+
+        if kind == "input_audio_buffer.append":
+            audio = base64.b64decode(event["audio"])
+            started_ms = self.audio_ms()
+            self.audio += audio
+            self.appended_bytes += len(audio)
+            if self.session.get("turn_detection") is not None:
+                if not self.speaking:
+                    self.speaking = True
+                    await self.send({"type": "input_audio_buffer.speech_started", "audio_start_ms": started_ms})
+                if self.vad_timer is not None:
+                    self.vad_timer.cancel()
+                loop = asyncio.get_running_loop()
+                self.vad_timer = loop.call_later(self.server.vad_silence, self._on_silence)
+            return
+
+        if kind == "input_audio_buffer.commit":
+            await self.commit()
+            return
+
+        if kind == "input_audio_buffer.clear":
+            self.audio.clear()
+            await self.send({"type": "input_audio_buffer.cleared"})
+            return
+
+        if kind == "response.create":
+            await self.start_response()
+            return
+
+        if kind == "response.cancel":
+            await self.cancel_response()
+            return
+
+        await self.send(
+            {
+                "type": "error",
+                "error": {"type": "invalid_request_error", "message": f"Unsupported event type: {kind}"},
+            }
+        )
+
+    def audio_ms(self) -> int:
+        """Milliseconds of audio appended since the session started."""
+        return self.appended_bytes * 1000 // (self.server.sample_rate * 2)
+
+    def _on_silence(self) -> None:
+        self.vad_timer = None
+        self.vad_task = asyncio.ensure_future(self._end_of_speech())
+
+    async def _end_of_speech(self) -> None:
+        self.speaking = False
+        try:
+            # Every appended byte counts as speech, so speech ends with the last append.
+            await self.send({"type": "input_audio_buffer.speech_stopped", "audio_end_ms": self.audio_ms()})
+            await self.commit()
+            await self.start_response()
+        except websockets.ConnectionClosed:
+            pass
+
+    async def commit(self) -> None:
+        self.committed_audio = bytes(self.audio)
+        self.audio.clear()
+        await self.send({"type": "input_audio_buffer.committed", "item_id": _new_id("item")})
+
+    async def start_response(self) -> None:
+        await self.cancel_response()
+        audio, self.committed_audio = self.committed_audio, b""
+        self.response_id = _new_id("resp")
+        await self.send({"type": "response.created", "response": {"id": self.response_id, "status": "in_progress"}})
+        self.response_task = asyncio.ensure_future(self.respond(self.response_id, audio))
+
+    async def cancel_response(self) -> None:
+        # The canceller reports the cancellation, since a task cancelled before
+        # its first step never gets to run any of its own cleanup.
+        task, self.response_task = self.response_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await self.finish_response(self.response_id, "cancelled")
+
+    async def respond(self, response_id: str, audio: bytes) -> None:
+        item_id = _new_id("item")
+        where = {"response_id": response_id, "item_id": item_id, "output_index": 0, "content_index": 0}
+
+        if self.server.response_delay:
+            await asyncio.sleep(self.server.response_delay)
+
+        chunk = self.server.audio_chunk_bytes
+        chunks = [audio[i : i + chunk] for i in range(0, len(audio), chunk)] or [bytes(chunk)]
+        words = self.server.response_text.split(" ")
+        for i in range(max(len(chunks), len(words))):
+            if i < len(chunks):
+                delta = base64.b64encode(chunks[i]).decode("ascii")
+                await self.send({"type": "response.audio.delta", **where, "delta": delta})
+            if i < len(words):
+                delta = words[i] if i == 0 else " " + words[i]
+                await self.send({"type": "response.audio_transcript.delta", **where, "delta": delta})
+
+        await self.send({"type": "response.audio.done", **where})
+        await self.send({"type": "response.audio_transcript.done", **where, "transcript": self.server.response_text})
+
+        # Nothing can cancel this response any more; clear it before the final await.
+        self.response_task = None
+        await self.finish_response(response_id, "completed")
+
+    async def finish_response(self, response_id: str, status: str) -> None:
+        try:
+            await self.send({"type": "response.done", "response": {"id": response_id, "status": status}})
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Realtime API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--response-delay", type=float, default=0.0, help="seconds to wait before responding")
+    parser.add_argument("--text", default="Hello from the fake realtime server.")
+    args = parser.parse_args()
+
+    server = FakeRealtimeServer(response_text=args.text, response_delay=args.response_delay)
+    await server.start(args.host, args.port)
+    logger.info("Fake realtime server listening on %s", server.url)
+    try:
+        await asyncio.Future()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+import base64
+import asyncio
+import itertools
+from typing import Any
+
+import pytest
+
+pytest.importorskip("websockets")
+pytest.importorskip("openai")
+
+from websockets.asyncio.client import connect
+
+import voice_relay
+from openai import AsyncOpenAI
+from voice_relay import FRAME_MS, VoiceRelay, AudioTimeline, PcmRingBuffer, LatencyTracker, ms_to_bytes
+from fake_realtime_server import FakeRealtimeServer
+
+
+def _drain(ring: PcmRingBuffer) -> bytes:
+    out = bytearray(ring.readable)
+    assert ring.read_into(out) == len(out)
+    return bytes(out)
+
+
+def test_ring_wraps_around() -> None:
+    ring = PcmRingBuffer(8)
+    ring.write(b"abcdef")
+    head = bytearray(4)
+    assert ring.read_into(head) == 4 and head == b"abcd"
+
+    ring.write(b"ghij")  # lands in slots 6, 7, 0, 1
+    assert ring.readable == 6
+    assert ring.dropped == 0
+
+    # Each drain stops at the physical end of the ring.
+    assert base64.b64decode(ring.drain_base64(100)) == b"efgh"
+    assert base64.b64decode(ring.drain_base64(100)) == b"ij"
+    assert ring.readable == 0
+    assert ring.drain_base64(100) == ""
+
+
+def test_ring_read_into_spans_the_wrap() -> None:
+    ring = PcmRingBuffer(8)
+    ring.write(b"abcdef")
+    ring.read_into(bytearray(5))
+    ring.write(b"ghijk")
+    assert _drain(ring) == b"fghijk"
+
+
+def test_ring_drain_respects_max_bytes() -> None:
+    ring = PcmRingBuffer(8)
+    ring.write(b"abcdef")
+    assert base64.b64decode(ring.drain_base64(4)) == b"abcd"
+    assert ring.readable == 2
+
+
+def test_ring_overflow_drops_oldest() -> None:
+    ring = PcmRingBuffer(8)
+    ring.write(b"abcdef")
+    ring.write(b"ghij")
+    assert ring.dropped == 2
+    assert _drain(ring) == b"cdefghij"
+
+
+def test_ring_oversized_write_keeps_the_tail() -> None:
+    ring = PcmRingBuffer(4)
+    ring.write(b"ab")
+    ring.write(b"cdefgh")
+    assert ring.dropped == 4
+    assert _drain(ring) == b"efgh"
+
+    ring.write(b"ijklmnop")
+    assert ring.dropped == 8
+    assert _drain(ring) == b"mnop"
+
+
+def test_audio_timeline_maps_offsets_to_times(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = itertools.count(1.0)
+    monkeypatch.setattr(voice_relay.time, "perf_counter", lambda: next(clock))
+
+    timeline = AudioTimeline(maxlen=2)
+    timeline.advance(10)  # bytes 0-10 at 1.0
+    timeline.advance(10)  # bytes 10-20 at 2.0
+    assert timeline.time_at(10) == 1.0
+    assert timeline.time_at(11) == 2.0
+    assert timeline.time_at(20) == 2.0
+    assert timeline.time_at(21) is None
+
+    timeline.advance(10)  # bytes 20-30 at 3.0, forgets 0-10
+    assert timeline.time_at(5) is None
+    assert timeline.time_at(30) == 3.0
+
+
+def test_latency_report_is_anchored_at_end_of_speech() -> None:
+    tracker = LatencyTracker(1.0, audio_in=0.5, dropped=4)
+    tracker.mark("appended", 1.02)
+    tracker.mark("speech_stopped", 1.22)
+    tracker.mark("committed", 1.23)
+    tracker.mark("committed", 9.0)  # ignored, first mark wins
+    tracker.mark("first_audio_delta", 1.25)
+    tracker.mark("first_audio_out", 1.26)
+
+    assert tracker.report() == pytest.approx(
+        {
+            "appended": 20.0,
+            "speech_stopped": 200.0,
+            "committed": 10.0,
+            "first_audio_delta": 20.0,
+            "first_audio_out": 10.0,
+            "speech_end_to_audio_out": 260.0,
+            "audio_in_to_speech_end": 500.0,
+        }
+    )
+    assert tracker.dropped == 4
+
+
+def test_latency_report_without_audio_out() -> None:
+    tracker = LatencyTracker(1.0)
+    tracker.mark("committed", 1.01)
+    assert tracker.report() == pytest.approx({"committed": 10.0})
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"batch_ms": -1}, {"max_batch_ms": 0}, {"buffer_ms": 0}], ids=["batch", "max_batch", "buffer"]
+)
+def test_relay_rejects_bad_batch_settings(kwargs: dict[str, int]) -> None:
+    with pytest.raises(ValueError):
+        VoiceRelay(AsyncOpenAI(api_key="test"), **kwargs)
+
+
+async def _run_turn(*, manual: bool) -> dict[str, Any]:
+    audio = bytes(range(256)) * (ms_to_bytes(FRAME_MS) * 3 // 256)
+    frame_size = ms_to_bytes(FRAME_MS)
+
+    async with FakeRealtimeServer(response_text="hi there", vad_silence_ms=50) as upstream:
+        client = AsyncOpenAI(api_key="test", websocket_base_url=upstream.url)
+        async with VoiceRelay(client, server_vad=not manual, batch_ms=20) as relay:
+            async with connect(relay.url) as websocket:
+                created = json.loads(await websocket.recv())
+                assert created["type"] == "session.created"
+
+                await websocket.send(b"\x00")
+                rejected = json.loads(await websocket.recv())
+                assert rejected["type"] == "error"
+
+                for i in range(0, len(audio), frame_size):
+                    await websocket.send(audio[i : i + frame_size])
+                if manual:
+                    await websocket.send(json.dumps({"type": "commit"}))
+
+                echoed = bytearray()
+                events: dict[str, Any] = {}
+                async for message in websocket:
+                    if isinstance(message, bytes):
+                        echoed += message
+                        continue
+                    event = json.loads(message)
+                    events.setdefault(event["type"], []).append(event)
+                    if event["type"] == "latency":
+                        break
+
+    assert bytes(echoed) == audio
+    return events
+
+
+@pytest.mark.parametrize("manual", [False, True], ids=["server_vad", "manual_commit"])
+def test_relay_turn_end_to_end(manual: bool) -> None:
+    events = asyncio.run(asyncio.wait_for(_run_turn(manual=manual), 10))
+
+    assert "".join(e["delta"] for e in events["transcript.delta"]) == "hi there"
+    assert [e["transcript"] for e in events["transcript.done"]] == ["hi there"]
+
+    (latency,) = events["latency"]
+    assert latency["dropped_bytes"] == 0
+    stages = latency["stages"]
+    after_speech = [stages[s] for s in LatencyTracker.STAGES[1:] if s in stages]
+    assert stages["speech_end_to_audio_out"] == pytest.approx(sum(after_speech), abs=0.05)
+    assert "appended" in stages
+    if not manual:
+        # The VAD hold is part of the turn, not hidden before its start.
+        assert stages["speech_end_to_audio_out"] >= 50
+
+
+async def _lose_upstream() -> dict[str, Any]:
+    async with FakeRealtimeServer() as upstream:
+        client = AsyncOpenAI(api_key="test", websocket_base_url=upstream.url)
+        async with VoiceRelay(client) as relay:
+            async with connect(relay.url) as websocket:
+                assert json.loads(await websocket.recv())["type"] == "session.created"
+                await upstream.stop()
+                return json.loads(await websocket.recv())
+
+
+def test_relay_reports_upstream_close_to_client() -> None:
+    event = asyncio.run(asyncio.wait_for(_lose_upstream(), 10))
+    assert event == {"type": "error", "message": "Realtime connection closed"}
+
+
+async def _send_bad_control_messages() -> list[dict[str, Any]]:
+    async with FakeRealtimeServer() as upstream:
+        client = AsyncOpenAI(api_key="test", websocket_base_url=upstream.url)
+        async with VoiceRelay(client) as relay:
+            async with connect(relay.url) as websocket:
+                assert json.loads(await websocket.recv())["type"] == "session.created"
+                replies = []
+                for message in ("not json", "[1]", json.dumps({"type": "nope"})):
+                    await websocket.send(message)
+                    replies.append(json.loads(await websocket.recv()))
+
+                # The session survives and still answers.
+                await websocket.send(b"\x00")
+                replies.append(json.loads(await websocket.recv()))
+                return replies
+
+
+def test_relay_rejects_bad_control_messages() -> None:
+    replies = asyncio.run(asyncio.wait_for(_send_bad_control_messages(), 10))
+    assert [r["message"] for r in replies] == [
+        "Control messages must be JSON objects",
+        "Control messages must be JSON objects",
+        "Unknown message type: 'nope'",
+        "Audio must be whole PCM16 samples",
+    ]
+
+
+async def _barge_in() -> list[dict[str, Any]]:
+    frame = bytes(ms_to_bytes(FRAME_MS))
+    async with FakeRealtimeServer(response_delay=0.2) as upstream:
+        client = AsyncOpenAI(api_key="test", websocket_base_url=upstream.url)
+        async with VoiceRelay(client, server_vad=False) as relay:
+            async with connect(relay.url) as websocket:
+                assert json.loads(await websocket.recv())["type"] == "session.created"
+                # The second turn ends while the first response is still pending.
+                for _ in range(2):
+                    await websocket.send(frame)
+                    await websocket.send(json.dumps({"type": "commit"}))
+
+                reports = []
+                async for message in websocket:
+                    if isinstance(message, str) and json.loads(message)["type"] == "latency":
+                        reports.append(json.loads(message))
+                        if len(reports) == 2:
+                            return reports
+    return []
+
+
+def test_relay_reports_every_turn_on_barge_in() -> None:
+    first, second = asyncio.run(asyncio.wait_for(_barge_in(), 10))
+    assert "speech_end_to_audio_out" not in first["stages"]  # cancelled before any audio
+    assert second["stages"]["speech_end_to_audio_out"] >= 200
@@ -0,0 +1,776 @@
+#!/usr/bin/env uv run
+####################################################################
+# Headless voice relay in front of the Realtime API                #
+# WebSocket clients stream raw PCM16 (24kHz mono) as binary        #
+# messages and get response audio back the same way, alongside     #
+# JSON transcript deltas and per-turn latency reports.             #
+#                                                                  #
+# `./voice_relay.py serve --port 8080`                             #
+# `./voice_relay.py mic ws://127.0.0.1:8080 [--push-to-talk]`      #
+# `./voice_relay.py load ws://127.0.0.1:8080 --sessions 100`       #
+#                                                                  #
+# Run `fake_realtime_server.py` and pass `--upstream-url` to       #
+# `serve` to exercise the relay without an API key.                #
+####################################################################
+#
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#     "sounddevice",
+#     "websockets",
+#     "openai[realtime]",
+# ]
+# ///
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import logging
+import argparse
+import threading
+import statistics
+from typing import Any
+from collections import deque
+
+import websockets
+from websockets.asyncio.client import connect
+from websockets.protocol import State
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+from openai import AsyncOpenAI
+from openai.resources.beta.realtime.realtime import AsyncRealtimeConnection
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+CHANNELS = 1
+SAMPLE_WIDTH = 2
+FRAME_MS = 20
+
+
+def ms_to_bytes(ms: int) -> int:
+    """Size in bytes of `ms` milliseconds of PCM16 audio, rounded down to whole samples."""
+    return SAMPLE_RATE * CHANNELS * ms // 1000 * SAMPLE_WIDTH
+
+
+class PcmRingBuffer:
+    """A fixed-size ring of PCM bytes shared between a producer and a consumer.
+
+    The backing storage is allocated once; writes copy into it and reads are
+    served straight from views over it, so the steady state allocates nothing
+    besides the encoded payload. When the ring is full the oldest audio is
+    dropped, since late audio is worse than missing audio for a live call.
+    Writers may run on another thread (e.g. a sounddevice callback).
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def readable(self) -> int:
+        return self._size
+
+    def write(self, data: Any) -> int:
+        src = memoryview(data).cast("B")
+        n = len(src)
+        cap = self._capacity
+        with self._lock:
+            if n >= cap:
+                self.dropped += self._size + n - cap
+                src = src[n - cap :]
+                n = cap
+                self._start = self._size = 0
+
+            overflow = self._size + n - cap
+            if overflow > 0:
+                self.dropped += overflow
+                self._consume(overflow)
+
+            end = (self._start + self._size) % cap
+            first = min(n, cap - end)
+            self._view[end : end + first] = src[:first]
+            if first < n:
+                self._view[: n - first] = src[first:]
+            self._size += n
+        return n
+
+    def drain_base64(self, max_bytes: int) -> str:
+        """Base64-encode and consume up to `max_bytes` of contiguous audio.
+
+        Only the run up to the physical end of the ring is taken, so a wrapped
+        buffer takes two calls; this keeps the encoder reading the ring in place.
+        """
+        with self._lock:
+            n = min(self._size, max_bytes, self._capacity - self._start)
+            payload = base64.b64encode(self._view[self._start : self._start + n]).decode("ascii")
+            self._consume(n)
+        return payload
+
+    def read_into(self, dest: Any) -> int:
+        """Copy as much audio as fits into the writable buffer `dest` and consume it."""
+        out = memoryview(dest).cast("B")
+        with self._lock:
+            n = min(self._size, len(out))
+            first = min(n, self._capacity - self._start)
+            out[:first] = self._view[self._start : self._start + first]
+            if first < n:
+                out[first:n] = self._view[: n - first]
+            self._consume(n)
+        return n
+
+    def _consume(self, n: int) -> None:
+        self._start = (self._start + n) % self._capacity
+        self._size -= n
+
+
+class AudioTimeline:
+    """Remembers when each stretch of an audio byte stream went past, so stream
+    offsets reported later (e.g. `audio_end_ms`) can be turned back into times."""
+
+    def __init__(self, maxlen: int = 3000) -> None:
+        self.total = 0
+        self._spans: deque[tuple[int, int, float]] = deque(maxlen=maxlen)
+
+    def advance(self, n: int) -> None:
+        start = self.total
+        self.total += n
+        self._spans.append((start, self.total, time.perf_counter()))
+
+    def time_at(self, offset: int) -> float | None:
+        """When the byte just before `offset` went past, or None if that is no longer remembered."""
+        for start, end, at in self._spans:
+            if start < offset <= end:
+                return at
+        return None
+
+
+class LatencyTracker:
+    """Timestamps for one turn, from the end of the user's speech to the first audio byte out.
+
+    End of speech is when the relay received the client frame holding the last
+    spoken sample. With server VAD that frame is found from `speech_stopped`'s
+    `audio_end_ms`, so the VAD hold and the relay's own batching both count;
+    with manual turns it is the client's `commit`. `audio_in`, the first client
+    frame of the turn, is only reported for context since it includes however
+    long the user was silent or talking.
+    """
+
+    STAGES = (
+        "end_of_speech",
+        "appended",
+        "speech_stopped",
+        "committed",
+        "response_created",
+        "first_audio_delta",
+        "first_audio_out",
+    )
+
+    def __init__(self, end_of_speech: float, *, audio_in: float | None = None, dropped: int = 0) -> None:
+        self._marks: dict[str, float] = {"end_of_speech": end_of_speech}
+        self.audio_in = audio_in
+        self.dropped = dropped
+
+    def reached(self, stage: str) -> bool:
+        return stage in self._marks
+
+    def mark(self, stage: str, at: float | None = None) -> None:
+        if stage not in self._marks:
+            self._marks[stage] = time.perf_counter() if at is None else at
+
+    def report(self) -> dict[str, float]:
+        """Milliseconds spent in each stage reached after end of speech, plus
+        `speech_end_to_audio_out` for the whole span and `audio_in_to_speech_end`."""
+        origin = self._marks["end_of_speech"]
+        report: dict[str, float] = {}
+        previous = origin
+        for stage in self.STAGES[1:]:
+            at = self._marks.get(stage)
+            if at is None or at < previous:
+                continue
+            report[stage] = round((at - previous) * 1000, 2)
+            previous = at
+        if "first_audio_out" in self._marks:
+            report["speech_end_to_audio_out"] = round((self._marks["first_audio_out"] - origin) * 1000, 2)
+        if self.audio_in is not None:
+            report["audio_in_to_speech_end"] = round((origin - self.audio_in) * 1000, 2)
+        return report
+
+
+class VoiceSession:
+    """Relays one client WebSocket to its own Realtime API connection.
+
+    Three tasks run per session: one reads client audio into the ring buffer,
+    one drains the ring upstream in batches, and one forwards upstream events
+    back to the client. Nothing polls; each task sleeps until it has work.
+    """
+
+    def __init__(self, relay: VoiceRelay, websocket: ServerConnection) -> None:
+        self.relay = relay
+        self.websocket = websocket
+        self.ring = PcmRingBuffer(ms_to_bytes(relay.buffer_ms))
+        self.received = AudioTimeline()
+        self.appended = AudioTimeline()
+        self.session_id: str | None = None
+        self._has_audio = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        # Each client commit, with the received-stream offset it applies up to.
+        self._commits: deque[tuple[int, LatencyTracker]] = deque()
+        # Turns are tracked separately so that a user talking over a response
+        # (barge-in) starts a new turn without clobbering the one in flight.
+        self._pending_turns: deque[LatencyTracker] = deque(maxlen=8)
+        self._turns_by_response: dict[str, LatencyTracker] = {}
+        self._turn_audio_in: float | None = None
+        self._dropped_at_turn_start = 0
+
+    async def run(self) -> None:
+        relay = self.relay
+        async with relay.client.beta.realtime.connect(
+            model=relay.model,
+            websocket_connection_options={"compression": None, "max_size": None},
+        ) as conn:
+            await conn.session.update(session={"turn_detection": relay.turn_detection})
+
+            tasks = [
+                asyncio.ensure_future(self._pump_client(conn)),
+                asyncio.ensure_future(self._send_audio(conn)),
+                asyncio.ensure_future(self._pump_upstream(conn)),
+            ]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _pump_client(self, conn: AsyncRealtimeConnection) -> None:
+        async for message in self.websocket:
+            if isinstance(message, bytes):
+                if len(message) % (SAMPLE_WIDTH * CHANNELS):
+                    # A partial sample would misalign every later sample in the ring.
+                    await self._send_json({"type": "error", "message": "Audio must be whole PCM16 samples"})
+                    continue
+                self._on_audio(message)
+                continue
+
+            try:
+                event = json.loads(message)
+            except ValueError:
+                event = None
+            if not isinstance(event, dict):
+                await self._send_json({"type": "error", "message": "Control messages must be JSON objects"})
+                continue
+
+            kind = event.get("type")
+            if kind == "commit":
+                self._commits.append((self.received.total, self._start_turn(time.perf_counter())))
+                self._has_audio.set()
+                self._batch_ready.set()
+            elif kind == "cancel":
+                await conn.response.cancel()
+            else:
+                await self._send_json({"type": "error", "message": f"Unknown message type: {kind!r}"})
+
+    def _on_audio(self, data: bytes) -> None:
+        if self._turn_audio_in is None:
+            self._turn_audio_in = time.perf_counter()
+        self.ring.write(data)
+        self.received.advance(len(data))
+        self._has_audio.set()
+        if self.ring.readable >= self.relay.batch_bytes:
+            self._batch_ready.set()
+
+    def _start_turn(self, end_of_speech: float) -> LatencyTracker:
+        turn = LatencyTracker(
+            end_of_speech,
+            audio_in=self._turn_audio_in,
+            dropped=self.ring.dropped - self._dropped_at_turn_start,
+        )
+        self._turn_audio_in = None
+        self._dropped_at_turn_start = self.ring.dropped
+        self._pending_turns.append(turn)
+        return turn
+
+    async def fail(self, message: str) -> None:
+        """Tell the client why its session ended and close the socket."""
+        try:
+            await self._send_json({"type": "error", "message": message})
+            await self.websocket.close(1011, message)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _send_audio(self, conn: AsyncRealtimeConnection) -> None:
+        relay = self.relay
+        while True:
+            await self._has_audio.wait()
+
+            # Hold partial batches for at most one batch window so that a slow
+            # trickle of frames still goes out as a handful of larger appends.
+            if not self._batch_ready.is_set():
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), relay.batch_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            self._has_audio.clear()
+            self._batch_ready.clear()
+
+            # Frames that arrive while a send is in flight are coalesced into the next one,
+            # but never across a commit: each commit goes out right after its own audio.
+            while True:
+                consumed = self.appended.total + self.ring.dropped
+                if self._commits and consumed >= self._commits[0][0]:
+                    _, turn = self._commits.popleft()
+                    turn.mark("appended")
+                    await conn.input_audio_buffer.commit()
+                    await conn.response.create()
+                    continue
+                if not self.ring.readable:
+                    break
+
+                limit = relay.max_batch_bytes
+                if self._commits:
+                    limit = min(limit, self._commits[0][0] - consumed)
+                readable = self.ring.readable
+                audio = self.ring.drain_base64(limit)
+                sent = readable - self.ring.readable
+                await conn.input_audio_buffer.append(audio=audio)
+                self.appended.advance(sent)
+
+    async def _pump_upstream(self, conn: AsyncRealtimeConnection) -> None:
+        async for event in conn:
+            if event.type == "session.created":
+                assert event.session.id is not None
+                self.session_id = event.session.id
+                await self._send_json({"type": "session.created", "session_id": self.session_id})
+                continue
+
+            if event.type == "input_audio_buffer.speech_stopped":
+                self._on_speech_stopped(event.audio_end_ms)
+                continue
+
+            if event.type == "input_audio_buffer.committed":
+                turn = next((t for t in self._pending_turns if not t.reached("committed")), None)
+                if turn is not None:
+                    turn.mark("committed")
+                continue
+
+            if event.type == "response.created":
+                if self._pending_turns and event.response.id is not None:
+                    turn = self._pending_turns.popleft()
+                    turn.mark("response_created")
+                    self._turns_by_response[event.response.id] = turn
+                continue
+
+            if event.type == "response.audio.delta":
+                turn = self._turns_by_response.get(event.response_id)
+                if turn is not None:
+                    turn.mark("first_audio_delta")
+                await self.websocket.send(base64.b64decode(event.delta))
+                if turn is not None:
+                    turn.mark("first_audio_out")
+                continue
+
+            if event.type == "response.audio_transcript.delta":
+                # Clients append each delta themselves rather than redrawing the whole transcript.
+                await self._send_json({"type": "transcript.delta", "item_id": event.item_id, "delta": event.delta})
+                continue
+
+            if event.type == "response.audio_transcript.done":
+                await self._send_json(
+                    {"type": "transcript.done", "item_id": event.item_id, "transcript": event.transcript}
+                )
+                continue
+
+            if event.type == "response.done":
+                turn = self._turns_by_response.pop(event.response.id or "", None)
+                if turn is None:
+                    continue
+                if turn.dropped:
+                    logger.warning(
+                        "Session %s dropped %d bytes of input audio this turn", self.session_id, turn.dropped
+                    )
+                report = turn.report()
+                logger.info("Session %s turn latency (ms): %s", self.session_id, report)
+                await self._send_json({"type": "latency", "stages": report, "dropped_bytes": turn.dropped})
+                continue
+
+            if event.type == "error":
+                logger.warning("Session %s upstream error: %s", self.session_id, event.error.message)
+                await self._send_json({"type": "error", "message": event.error.message})
+                continue
+
+    def _on_speech_stopped(self, audio_end_ms: int) -> None:
+        now = time.perf_counter()
+        end = ms_to_bytes(audio_end_ms)
+        # Upstream never saw the audio the ring dropped, so its offsets run behind the received stream's.
+        received_at = self.received.time_at(end + self.ring.dropped)
+        turn = self._start_turn(received_at if received_at is not None else now)
+        appended_at = self.appended.time_at(end)
+        if appended_at is not None:
+            turn.mark("appended", appended_at)
+        turn.mark("speech_stopped", now)
+
+    async def _send_json(self, event: dict[str, Any]) -> None:
+        await self.websocket.send(json.dumps(event))
+
+
+class VoiceRelay:
+    """Accepts client WebSockets and gives each one a `VoiceSession`."""
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        *,
+        model: str = "gpt-4o-realtime-preview",
+        server_vad: bool = True,
+        batch_ms: int = 40,
+        max_batch_ms: int = 200,
+        buffer_ms: int = 2000,
+    ) -> None:
+        if batch_ms < 0:
+            raise ValueError(f"batch_ms must be >= 0, got {batch_ms}")
+        if max_batch_ms <= 0:
+            raise ValueError(f"max_batch_ms must be > 0, got {max_batch_ms}")
+        if buffer_ms <= 0:
+            raise ValueError(f"buffer_ms must be > 0, got {buffer_ms}")
+        self.client = client
+        self.model = model
+        self.turn_detection = {"type": "server_vad"} if server_vad else None
+        self.batch_ms = batch_ms
+        self.batch_bytes = ms_to_bytes(batch_ms)
+        self.max_batch_bytes = ms_to_bytes(max_batch_ms)
+        self.buffer_ms = buffer_ms
+        self.sessions: set[VoiceSession] = set()
+        self._server: Server | None = None
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None, "relay is not running"
+        host, port = list(self._server.sockets)[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> VoiceRelay:
+        # A client message is buffered whole before it reaches the ring, so cap it at the ring's size.
+        self._server = await serve(self.handle, host, port, compression=None, max_size=ms_to_bytes(self.buffer_ms))
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> VoiceRelay:
+        return await self.start()
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    async def serve(self, host: str, port: int) -> None:
+        await self.start(host, port)
+        logger.info("Voice relay listening on %s", self.url)
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    async def handle(self, websocket: ServerConnection) -> None:
+        session = VoiceSession(self, websocket)
+        self.sessions.add(session)
+        try:
+            await session.run()
+        except websockets.ConnectionClosed:
+            # Closed by the client; anything else means the realtime side went away.
+            if websocket.state is State.OPEN:
+                logger.warning("Realtime connection for session %s closed", session.session_id)
+                await session.fail("Realtime connection closed")
+        except Exception:
+            logger.exception("Voice session %s failed", session.session_id)
+            await session.fail("Realtime session failed")
+        else:
+            if websocket.state is State.OPEN:
+                logger.warning("Realtime connection for session %s closed", session.session_id)
+                await session.fail("Realtime connection closed")
+        finally:
+            self.sessions.discard(session)
+
+
+class MicCapture:
+    """Captures microphone audio into a ring buffer from the sounddevice callback.
+
+    The callback only copies the block into the ring and wakes the event loop,
+    so the loop never has to poll the device for available frames.
+    """
+
+    def __init__(self, ring: PcmRingBuffer, ready: asyncio.Event) -> None:
+        self.ring = ring
+        self.ready = ready
+        self._loop = asyncio.get_running_loop()
+        self._stream: Any = None
+
+    def start(self) -> None:
+        import sounddevice as sd  # type: ignore
+
+        self._stream = sd.RawInputStream(
+            channels=CHANNELS,
+            samplerate=SAMPLE_RATE,
+            dtype="int16",
+            blocksize=SAMPLE_RATE * FRAME_MS // 1000,
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, indata: Any, frames: int, time_info: Any, status: Any) -> None:
+        self.ring.write(indata)
+        self._loop.call_soon_threadsafe(self.ready.set)
+
+
+def _read_stdin_lines(loop: asyncio.AbstractEventLoop, lines: asyncio.Queue[str | None]) -> None:
+    # Runs on a daemon thread so a blocked readline never holds up shutdown.
+    for line in iter(sys.stdin.readline, ""):
+        loop.call_soon_threadsafe(lines.put_nowait, line.strip())
+    loop.call_soon_threadsafe(lines.put_nowait, None)
+
+
+async def run_mic_client(url: str, *, push_to_talk: bool = False) -> None:
+    """Stream the default microphone to a relay and play back the responses.
+
+    Typing `c` and Enter cancels the current response. With `push_to_talk`,
+    Enter starts and stops talking and each stop sends `commit`, which relays
+    running `--manual-turns` need. The client then logs the time from the last
+    frame it sent to the first audio byte it gets back. With server VAD the
+    client cannot tell where speech ended, so the relay's report is the measure.
+    """
+    import sounddevice as sd  # type: ignore
+
+    loop = asyncio.get_running_loop()
+    mic_ring = PcmRingBuffer(ms_to_bytes(2000))
+    playback_ring = PcmRingBuffer(ms_to_bytes(30000))
+    mic_ready = asyncio.Event()
+    mic = MicCapture(mic_ring, mic_ready)
+    lines: asyncio.Queue[str | None] = asyncio.Queue()
+    threading.Thread(target=_read_stdin_lines, args=(loop, lines), daemon=True).start()
+
+    talking = not push_to_talk
+    last_sent: float | None = None
+    awaiting_since: float | None = None
+
+    def play(outdata: Any, frames: int, time_info: Any, status: Any) -> None:
+        out = memoryview(outdata).cast("B")
+        n = playback_ring.read_into(out)
+        out[n:] = bytes(len(out) - n)
+
+    async with connect(url, compression=None, max_size=None) as websocket:
+
+        async def send_mic() -> None:
+            nonlocal last_sent
+            frame = memoryview(bytearray(ms_to_bytes(FRAME_MS)))
+            while True:
+                await mic_ready.wait()
+                mic_ready.clear()
+                while mic_ring.readable:
+                    n = mic_ring.read_into(frame)
+                    if talking:
+                        await websocket.send(frame[:n])
+                        last_sent = time.perf_counter()
+
+        async def handle_commands() -> None:
+            nonlocal talking, awaiting_since
+            while True:
+                line = await lines.get()
+                if line is None:
+                    return
+                if line == "c":
+                    await websocket.send(json.dumps({"type": "cancel"}))
+                elif push_to_talk and talking:
+                    talking = False
+                    awaiting_since = last_sent
+                    await websocket.send(json.dumps({"type": "commit"}))
+                    logger.info("Sent; press Enter to talk again")
+                elif push_to_talk:
+                    talking = True
+                    logger.info("Talking... press Enter to send")
+
+        speaker = sd.RawOutputStream(channels=CHANNELS, samplerate=SAMPLE_RATE, dtype="int16", callback=play)
+        tasks: list[asyncio.Future[None]] = []
+        try:
+            mic.start()
+            speaker.start()
+            tasks.append(asyncio.ensure_future(send_mic()))
+            tasks.append(asyncio.ensure_future(handle_commands()))
+            if push_to_talk:
+                logger.info("Press Enter to start talking (c + Enter cancels a response)")
+
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    if awaiting_since is not None:
+                        logger.info("Mic to first audio byte: %.1f ms", (time.perf_counter() - awaiting_since) * 1000)
+                        awaiting_since = None
+                    playback_ring.write(message)
+                    continue
+
+                event = json.loads(message)
+                if event["type"] == "transcript.delta":
+                    sys.stdout.write(event["delta"])
+                    sys.stdout.flush()
+                elif event["type"] == "transcript.done":
+                    sys.stdout.write("\n")
+                elif event["type"] == "latency":
+                    logger.info("Turn latency (ms): %s", event["stages"])
+                elif event["type"] == "error":
+                    logger.warning("Relay error: %s", event["message"])
+        finally:
+            for task in tasks:
+                task.cancel()
+            mic.stop()
+            speaker.stop()
+            speaker.close()
+
+
+async def run_load_client(
+    url: str, *, sessions: int, seconds: float, commit: bool = False, timeout: float = 10.0
+) -> None:
+    """Open `sessions` concurrent relay connections that each stream one turn of
+    synthetic audio in real time, then summarise the relay's latency reports.
+
+    Pass `commit` when the relay runs with `--manual-turns`. A session that has
+    no latency report `timeout` seconds after its audio is sent counts as failed.
+    """
+
+    async def wait_for_report(websocket: Any) -> dict[str, float]:
+        async for message in websocket:
+            if isinstance(message, str):
+                event = json.loads(message)
+                if event["type"] == "latency":
+                    return event["stages"]
+                if event["type"] == "error":
+                    raise RuntimeError(event["message"])
+        raise RuntimeError("relay closed the connection before reporting latency")
+
+    async def one_session() -> dict[str, float]:
+        frame = bytes(ms_to_bytes(FRAME_MS))
+        async with connect(url, compression=None, max_size=None) as websocket:
+            started = time.perf_counter()
+            for i in range(int(seconds * 1000 / FRAME_MS)):
+                await websocket.send(frame)
+                # Pace against the wall clock so frames don't drift behind real time.
+                await asyncio.sleep(max(0.0, started + (i + 1) * FRAME_MS / 1000 - time.perf_counter()))
+            if commit:
+                await websocket.send(json.dumps({"type": "commit"}))
+            return await asyncio.wait_for(wait_for_report(websocket), timeout)
+
+    results = await asyncio.gather(*(one_session() for _ in range(sessions)), return_exceptions=True)
+    reports = [r for r in results if isinstance(r, dict)]
+    failures = [r for r in results if isinstance(r, BaseException)]
+    timeouts = sum(isinstance(r, asyncio.TimeoutError) for r in failures)
+    for failure in failures:
+        if not isinstance(failure, asyncio.TimeoutError):
+            logger.warning("Load session failed: %r", failure)
+    if failures:
+        logger.warning("%d of %d sessions failed (%d timed out)", len(failures), sessions, timeouts)
+
+    values = sorted(r["speech_end_to_audio_out"] for r in reports if "speech_end_to_audio_out" in r)
+    if not values:
+        logger.error("No latency reports received from %d sessions", sessions)
+        return
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    logger.info(
+        "End of speech to first audio out over %d sessions: median %.1f ms, p95 %.1f ms",
+        len(values),
+        statistics.median(values),
+        p95,
+    )
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be zero or a positive integer, got {value}")
+    return number
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless voice relay for the Realtime API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run the relay")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--model", default="gpt-4o-realtime-preview")
+    serve_parser.add_argument("--upstream-url", help="Realtime WebSocket base URL, e.g. a fake_realtime_server.py")
+    serve_parser.add_argument("--manual-turns", action="store_true", help="disable server VAD; clients send commit")
+    serve_parser.add_argument(
+        "--batch-ms", type=_non_negative_int, default=40, help="audio to collect before sending upstream"
+    )
+    serve_parser.add_argument("--max-batch-ms", type=_positive_int, default=200, help="largest single upstream append")
+    serve_parser.add_argument(
+        "--buffer-ms", type=_positive_int, default=2000, help="client audio to hold per session before dropping"
+    )
+
+    mic_parser = commands.add_parser("mic", help="talk to a relay from the default microphone")
+    mic_parser.add_argument("url")
+    mic_parser.add_argument(
+        "--push-to-talk", action="store_true", help="Enter starts and stops talking; needed with --manual-turns"
+    )
+
+    load_parser = commands.add_parser("load", help="drive a relay with concurrent synthetic sessions")
+    load_parser.add_argument("url")
+    load_parser.add_argument("--sessions", type=int, default=50)
+    load_parser.add_argument("--seconds", type=float, default=1.0, help="audio streamed per session")
+    load_parser.add_argument("--commit", action="store_true", help="commit each turn, for --manual-turns relays")
+    load_parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each latency report")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.upstream_url:
+            client = AsyncOpenAI(
+                api_key=os.environ.get("OPENAI_API_KEY", "unused"),
+                websocket_base_url=args.upstream_url,
+            )
+        else:
+            client = AsyncOpenAI()
+        relay = VoiceRelay(
+            client,
+            model=args.model,
+            server_vad=not args.manual_turns,
+            batch_ms=args.batch_ms,
+            max_batch_ms=args.max_batch_ms,
+            buffer_ms=args.buffer_ms,
+        )
+        await relay.serve(args.host, args.port)
+    elif args.command == "mic":
+        await run_mic_client(args.url, push_to_talk=args.push_to_talk)
+    else:
+        await run_load_client(
+            args.url, sessions=args.sessions, seconds=args.seconds, commit=args.commit, timeout=args.timeout
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main())